@@ -0,0 +1,47 @@
+"""
+Author: Joel Weber
+Date: 14/10/2026
+Description: Converts values into hashable keys and back so that they can be used to cache results
+
+Notes:
+- Every value keeps its type in the key so that 1, 1.0 and True or [1] and (1,) do not share a key
+"""
+
+def freeze(value):
+    """Converts a value into a hashable key. Containers are converted recursively, including dict keys and set members
+
+    Args:
+        value (any): Value to be converted
+
+    Returns:
+        tuple: Hashable key for the value
+    """
+    t = type(value)
+    if t is list or t is tuple:
+        return (t, tuple([freeze(v) for v in value]))
+
+    elif t is dict:
+        return (t, frozenset([(freeze(k), freeze(v)) for k, v in value.items()]))
+
+    elif t is set or t is frozenset:
+        return (t, frozenset([freeze(v) for v in value]))
+
+    return (t, value)
+
+def thaw(key):
+    """Rebuilds the value that was converted by freeze. The order of dict keys and set members is not kept
+
+    Args:
+        key (tuple): Key returned by freeze
+
+    Returns:
+        any: The value
+    """
+    t, value = key
+    if t is dict:
+        return {thaw(k): thaw(v) for k, v in value}
+
+    elif t is list or t is tuple or t is set or t is frozenset:
+        return t(thaw(v) for v in value)
+
+    return value
@@ -6,6 +6,7 @@ Desciption: Generic unit testing for a variety of functions
 Notes:
 - At the moment this does not allow for keyword arguments to be passed to the function
 - The tests must be a list of lists and the last argument may be an expected exception, but does not have to be
+- The collection of tests may also be a generator so that very large suites are never held in memory at once
 
 TODO:
 - Add support for keyword arguments
@@ -13,48 +14,217 @@ TODO:
 - Add run time option for the tests
 
 """
-from pynput.keyboard import Key, Controller 
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache
+from itertools import repeat
+import sys
 import time
 
+from frozen_keys import freeze
+
+# Keys that mark a dictionary in a test case as configuration rather than a function argument
+_CONTROL_KEYS = frozenset({"err", "expect", "not_expect", "kwargs", "raise_err"})
+
+# Failure messages, these are only formatted once a test has actually failed
+_FAIL_NOT_RAISED = "Expected exception %s was not raised"
+_FAIL_VALUE = "Expected value %s but got %s"
+_FAIL_NOT_EXPECT = "Did not expect %s to equal %s"
+_FAIL_UNEXPECTED = "Unexpected exception: %s"
+_FAIL_WRONG_EXCEPTION = "Expected exception %s but got %s"
+
 class GenericTesting:
-    def __doc__(self):
-        """
-        Generic Testing for all python functions. The class allows for any python function to be tested with any arguments and compared to an expected value
-        or exception. The class also allows for keypresses to be spoofed during runtime. Each test passed to the class must be a list of test cases to be run.
-        The expected value and exceptions must be passed in a dictionary with the key "err" or "expect" respectively. The kwargs parameter must also be a 
-        dictionary with the key "kwargs" set to True.
-        """
+    """
+    Generic Testing for all python functions. The class allows for any python function to be tested with any arguments and compared to an expected value
+    or exception. The class also allows for keypresses to be spoofed during runtime. Each test passed to the class must be a list of test cases to be run.
+    The expected value and exceptions must be passed in a dictionary with the key "err" or "expect" respectively. The kwargs parameter must also be a 
+    dictionary with the key "kwargs" set to True.
+    """
+
+    # keyboard is a lazily created property backed by _keyboard
+    __slots__ = ("_keyboard", "_cache")
+
     def __init__(self):
-        self.keyboard = Controller()    
+        # pynput is slow to import and needs a display, so the controller is only created once a keypress is spoofed
+        self._keyboard = None
+        # Outcomes of earlier calls keyed by the function and its arguments, see run_tests(cache=True)
+        self._cache = {}
 
-    def run_tests(self, func, test_cases, print_args=False, print_res=False):
-        failed_tests = []
-        print(f"Running tests for {func.__name__}:\n")
-        for i, test in enumerate(test_cases):
-            assert isinstance(test, list), "Test cases must be a list of lists"
+    @property
+    def keyboard(self):
+        """Keyboard controller used to spoof keypresses, created on first use"""
+        if self._keyboard is None:
+            from pynput.keyboard import Controller
+            self._keyboard = Controller()
+
+        return self._keyboard
+
+    def run_tests(self, func, test_cases, print_args=False, print_res=False, flush_every=1000, parallel=False, io_parallel=False, max_workers=None, cache=False):
+        """Runs every test case against func and reports which ones failed
+
+        Args:
+            func (python function): Function to be tested
+            test_cases (iterable): Test cases, each one a list of arguments and optional control dictionaries. A generator can be passed to avoid
+            building every test case up front, it is consumed one test at a time unless running in parallel.
+            print_args (bool, optional): Print the arguments of each test. Defaults to False.
+            print_res (bool, optional): Print the result of each test. Defaults to False.
+            flush_every (int, optional): When printing arguments or results the report is buffered and written out every flush_every tests. Must be at least 1.
+            Defaults to 1000.
+            parallel (bool, optional): Run the tests across processes. func and the test arguments must be picklable (e.g. a module level function, not a lambda)
+            and func must not rely on shared state. Methods of this instance, such as the keypress spoofing, always run sequentially. Defaults to False.
+            io_parallel (bool, optional): Run the tests across threads so that tests which mostly wait, such as the delays between spoofed keypresses, overlap.
+            Only use this with the keypress spoofing if interleaved keypresses from different tests are acceptable. Defaults to False.
+            max_workers (int, optional): Number of workers when running in parallel. Defaults to the number of CPUs for processes and 8 for threads.
+            cache (bool, optional): Reuse the outcome of earlier calls of func with the same arguments, across tests and runs on this instance. Only use this
+            for pure functions. Arguments that cannot be hashed are never cached and the cache is not shared with worker processes. Defaults to False.
+        """
+        if flush_every < 1:
+            raise ValueError(f"flush_every must be at least 1, got {flush_every}")
+
+        # Verbose runs produce several lines per test so they are written out in batches instead of one print at a time
+        if not (print_args or print_res):
+            flush_every = 1
+
+        # The keypress spoofing shares the keyboard controller of this instance so it is never run in parallel, and its side effects are never cached
+        if getattr(func, "__self__", None) is self:
+            parallel = False
+            cache = False
 
-            print(f"  Running test {i+1}: {func.__name__}:")
-            if print_args:
-                print(f"  args: ({self._get_args_and_exception(test)[0]}) ->")
+        cache = self._cache if cache and not parallel else None
 
-            res, failure = self._test_function(func, test)
+        name = func.__name__
+        header = f"  Running test %d: {name}:"
+        fail_tmpl = "    Test %d failed with error: %s"
+        pass_tmpl = "    Test %d passed"
 
-            if failure is not None:
-                print(f"    Test {i+1} failed with error: {failure}")
-                failed_tests.append(i+1)
+        if not hasattr(test_cases, "__iter__"):
+            raise TypeError("Test cases must be an iterable of lists")
+
+        out = [f"Running tests for {name}:\n"]
+        # One bit per test, set when the test fails. It is sized up front when the number of tests is known and doubled as needed otherwise
+        failed = bytearray((len(test_cases) + 7) // 8 if hasattr(test_cases, "__len__") else 64)
+        any_failed = False
+        try:
+            if parallel:
+                executor = ProcessPoolExecutor(max_workers=max_workers)
+            elif io_parallel:
+                executor = ThreadPoolExecutor(max_workers=max_workers or 8)
             else:
-                print(f"    Test {i+1} passed")
+                executor = nullcontext()
 
-            if print_res:
-                print(f"    result: {res}")
+            with executor as executor:
+                parsed_cases = self._parse_cases(test_cases)
+                if executor is not None:
+                    # All of the tests are submitted up front, map hands the results back in the original order
+                    parsed_cases = list(parsed_cases)
+                    results = executor.map(GenericTesting._run_parsed, repeat(func), parsed_cases, repeat(cache))
 
-            print()
+                for i, parsed in enumerate(parsed_cases):
+                    out.append(header % (i+1))
+                    if print_args:
+                        out.append(f"  args: ({parsed[0]}) ->")
 
-        if len(failed_tests) == 0:
-            print(f"Tests for {func.__name__} all passed\n")
+                    res, failure = self._run_parsed(func, parsed, cache) if executor is None else next(results)
 
-        else:
-            print(f"Tests for {func.__name__} failed on tests: {failed_tests}\n")
+                    if failure is not None:
+                        out.append(fail_tmpl % (i+1, failure))
+                        if i >> 3 >= len(failed):
+                            failed.extend(bytes(len(failed) or 1))
+                        failed[i >> 3] |= 1 << (i & 7)
+                        any_failed = True
+                    else:
+                        out.append(pass_tmpl % (i+1))
+
+                    if print_res:
+                        out.append(f"    result: {res}")
+
+                    out.append("")
+
+                    if (i + 1) % flush_every == 0:
+                        self._flush_output(out)
+
+            if not any_failed:
+                out.append(f"Tests for {name} all passed\n")
+
+            else:
+                out.append(f"Tests for {name} failed on tests: {self._decode_failures(failed)}\n")
+
+        finally:
+            self._flush_output(out)
+
+    def parametrize(self, test_cases, argname="case"):
+        """Wraps the test cases in a pytest.mark.parametrize decorator so pytest collects each one as its own test.
+        This allows pytest to select (-k), stop on (-x) and distribute (pytest-xdist) the test cases. run_tests remains available without pytest.
+
+        Example:
+            @gt.parametrize(tests)
+            def test_divide(case):
+                gt.check_case(divide, case)
+
+        Args:
+            test_cases (list): List of test cases in the same format as run_tests
+            argname (str, optional): Name of the test function parameter that receives each test case. Defaults to "case".
+
+        Returns:
+            MarkDecorator: pytest parametrize decorator
+        """
+        import pytest
+
+        test_cases = list(test_cases)
+        return pytest.mark.parametrize(argname, test_cases, ids=[f"test{i+1}" for i in range(len(test_cases))])
+
+    def check_case(self, func, case):
+        """Runs a single test case and raises an AssertionError if it fails, for use inside a parametrized pytest test
+
+        Args:
+            func (python function): Function to be tested
+            case (list): A single test case in the same format as run_tests
+
+        Returns:
+            any value: Result of the function
+        """
+        res, failure = self._test_function(func, case)
+        if failure is not None:
+            raise AssertionError(failure)
+
+        return res
+
+    def _parse_cases(self, test_cases):
+        """Checks and parses the test cases one at a time
+
+        Args:
+            test_cases (list): List of test cases
+
+        Yields:
+            tuple: Output of _get_args_and_exception for each test case
+        """
+        for i, test in enumerate(test_cases):
+            # Raised rather than asserted so that bad input is still caught under python -O
+            if not isinstance(test, list):
+                raise TypeError(f"Test cases must be a list of lists, test {i+1} is {type(test).__name__}")
+            yield self._get_args_and_exception(test)
+
+    @staticmethod
+    def _decode_failures(failed):
+        """Converts the bitmap of failed tests from run_tests into test numbers
+
+        Args:
+            failed (bytearray): Bitmap with the bit of each failed test set
+
+        Returns:
+            list: Numbers of the failed tests, starting from 1
+        """
+        return [(byte_i << 3) + bit + 1 for byte_i, byte in enumerate(failed) if byte for bit in range(8) if byte & (1 << bit)]
+
+    def _flush_output(self, out):
+        """Writes the buffered report lines to stdout in a single call and empties the buffer
+
+        Args:
+            out (list): Lines of the report, each one is written as if it were printed
+        """
+        if out:
+            sys.stdout.write("\n".join(out) + "\n")
+            out.clear()
 
     def _test_function(self, func, args = []):
         """This is a formatting and testing function for any of the test cases below. 
@@ -66,31 +236,44 @@ class GenericTesting:
             func (python function): Function to be tested
             args (list): List of arguments with the last parameter as an expected exception
         """
-        func_args, kwargs, expected_exception, expected_value, not_expect, raise_err = self._get_args_and_exception(args)
+        return self._run_parsed(func, self._get_args_and_exception(args))
+
+    @staticmethod
+    def _run_parsed(func, parsed, cache=None):
+        """Runs a single test case that has already been split up by _get_args_and_exception
+
+        Args:
+            func (python function): Function to be tested
+            parsed (tuple): Output of _get_args_and_exception for the test case
+            cache (dict, optional): Outcomes of earlier calls to reuse, see _call_cached. Defaults to None.
+
+        Returns:
+            any value: Result of the function, None if it raised
+            str: Reason the test failed, None if it passed
+
+        Note: This is a staticmethod so it can be sent to worker processes without the instance
+        """
+        func_args, kwargs, expected_exception, expected_value, not_expect, raise_err, mode = parsed
 
         res = None
         failure = None
 
         try:
-            res = func(*func_args, **kwargs)
-            if expected_exception is not None:
-                failure = f"Expected exception {'any exception' if expected_exception == '_' else expected_exception} was not raised"
-            elif expected_value is not None:
-                if not self._compare_results(res, expected_value):
-                    failure = f"Expected value {expected_value} but got {res}"
-            elif not_expect is not None:
-                if self._compare_results(res, not_expect):
-                    failure = f"Did not expect {res} to equal {not_expect if not_expect != '_' else 'any value'}"
+            if cache is None:
+                res = func(*func_args, **kwargs)
+            else:
+                res = GenericTesting._call_cached(cache, func, func_args, kwargs)
+            failure = _EXPECTATION_CHECKS[mode](res, (None, expected_exception, expected_value, not_expect)[mode])
 
             if raise_err and failure is not None:
                 raise Exception(failure)
 
         except Exception as e:
             if expected_exception is None:
-                failure = f"Unexpected exception: {e}"
+                failure = _FAIL_UNEXPECTED % (e,)
 
-            elif expected_exception is not None and expected_exception != "_" and not isinstance(e, expected_exception):
-                failure = f"Expected exception {expected_exception} but got {e}"
+            elif expected_exception != "_" and not isinstance(e, expected_exception):
+                failure = _FAIL_WRONG_EXCEPTION % (expected_exception, e)
 
             if raise_err and failure is not None:
                 raise e
@@ -98,7 +281,41 @@ class GenericTesting:
 
         return res, failure
 
-    def _compare_results(self, res, expected_value):
+    @staticmethod
+    def _call_cached(cache, func, func_args, kwargs):
+        """Calls the function unless it has already been called with the same arguments. Exceptions are cached and raised again as well.
+
+        Args:
+            cache (dict): Outcomes of earlier calls keyed by the function and its frozen arguments
+            func (python function): Function to be called
+            func_args (list): Positional arguments for the function
+            kwargs (dict): Keyword arguments for the function
+
+        Returns:
+            any value: Result of the function
+        """
+        try:
+            key = (func, freeze(func_args), freeze(kwargs))
+            outcome = cache.get(key)
+        except TypeError:
+            # Arguments that cannot be hashed are never cached
+            return func(*func_args, **kwargs)
+
+        if outcome is None:
+            try:
+                outcome = (func(*func_args, **kwargs), None)
+            except Exception as e:
+                outcome = (None, e)
+            cache[key] = outcome
+
+        res, err = outcome
+        if err is not None:
+            raise err
+
+        return res
+
+    @staticmethod
+    def _compare_results(res, expected_value):
         """Compares the result of the function to the expected value
 
         Args:
@@ -108,19 +325,17 @@ class GenericTesting:
         Returns:
             bool: True if the result is equal to the expected value
         """
-        if type(expected_value) in [list, tuple] and type(res) in [list, tuple]:
+        if isinstance(expected_value, (list, tuple)) and isinstance(res, (list, tuple)):
             if len(expected_value) != len(res):
                 return False
 
-            for res_val, exp_val in zip(res, expected_value):
-                if exp_val != "_" and res_val != exp_val:
-                    return False
+            # Without any wildcards the builtin comparison does the whole job in one call
+            if type(res) is type(expected_value) and "_" not in expected_value:
+                return res == expected_value
 
-        else:
-            if expected_value != "_" and res != expected_value:
-                return False
-        
-        return True
+            return all(exp_val == "_" or res_val == exp_val for res_val, exp_val in zip(res, expected_value))
+
+        return expected_value == "_" or res == expected_value
             
 
     def _get_args_and_exception(self, args):
@@ -131,8 +346,12 @@ class GenericTesting:
 
         Returns:
             list: List of arguments for the function
+            dict: Keyword arguments for the function
             type: Expected error 
             any value: Expected value
+            any value: Value the result must not equal
+            bool: Whether a failure should raise instead of being reported
+            int: Which expectation is checked, 0 for none, 1 for the error, 2 for the expected value and 3 for the value not expected
         """
         kwargs = {}
         new_args = []
@@ -142,30 +361,49 @@ class GenericTesting:
         raise_err = False
 
         for arg in args:
-            if isinstance(arg, dict) and "err" in arg:
-                assert arg["err"] == "_" or issubclass(arg["err"], BaseException), "Expected exception must be a subclass of BaseException"
-                err = arg["err"]
+            # Only dictionaries carrying one of the control keys configure the test, anything else is passed to the function
+            if type(arg) is not dict:
+                new_args.append(arg)
+                continue
+
+            keys = arg.keys() & _CONTROL_KEYS
+            if not keys:
+                new_args.append(arg)
+                continue
 
+            get = arg.get
+            if "err" in keys:
+                err = get("err")
+                if err != "_":
+                    _validate_exc(err)
 
-            elif isinstance(arg, dict) and "expect" in arg:
-                expect = arg["expect"]
+            elif "expect" in keys:
+                expect = get("expect")
 
-            elif isinstance(arg, dict) and "not_expect" in arg:
-                not_expect = arg["not_expect"]
+            elif "not_expect" in keys:
+                not_expect = get("not_expect")
 
-            elif isinstance(arg, dict) and "kwargs" in arg and arg["kwargs"] is True:
-                kwargs_copy = arg.copy()
-                del kwargs_copy["kwargs"]
-                kwargs = kwargs_copy 
+            elif get("kwargs") is True:
+                kwargs = {k: v for k, v in arg.items() if k != "kwargs"} if len(arg) > 1 else {}
 
-            else:
+            elif "raise_err" not in keys:
                 new_args.append(arg)
-            
-            if isinstance(arg, dict) and "raise_err" in arg:
-                assert isinstance(arg["raise_err"], bool), "raise_err must be a boolean"
-                raise_err = arg["raise_err"]
 
-        return new_args, kwargs, err, expect, not_expect, raise_err
+            if "raise_err" in keys:
+                raise_err = get("raise_err")
+                assert isinstance(raise_err, bool), "raise_err must be a boolean"
+
+        # Only one expectation is checked per test, an expected error takes precedence over the values
+        if err is not None:
+            mode = 1
+        elif expect is not None:
+            mode = 2
+        elif not_expect is not None:
+            mode = 3
+        else:
+            mode = 0
+
+        return new_args, kwargs, err, expect, not_expect, raise_err, mode
 
 
     def get_kwargs(self, args):
@@ -198,17 +436,84 @@ class GenericTesting:
         self.keyboard.release(key)
 
     
-    def _spoof_keypresses(self, keys, delay=0.1):
+    def _spoof_keypresses(self, keys, delay=0.1, chunk_size=32):
         """Enters a sequence of key presses into the system during runtime
 
         Args:
             keys (list): List of keys to be pressed
+            delay (float, optional): Seconds to wait after each chunk of characters or special key. Defaults to 0.1.
+            chunk_size (int, optional): Runs of single characters are typed together in chunks of up to chunk_size keys. Set to 1 to wait after every key. Defaults to 32.
         """
-        for key in keys:
-            self._spoof_keypress(key)
-            print(delay)
+        for step in self._chunk_keys(keys, chunk_size):
+            if isinstance(step, str):
+                self.keyboard.type(step)
+            else:
+                self._spoof_keypress(step)
             time.sleep(delay)
 
+    @staticmethod
+    def _chunk_keys(keys, chunk_size):
+        """Groups runs of single character keys into strings so they can be typed in one call
+
+        Args:
+            keys (list): List of keys to be pressed
+            chunk_size (int): Maximum number of characters in a group
+
+        Yields:
+            str or Key: A group of characters or a special key
+        """
+        chunk = []
+        for key in keys:
+            if isinstance(key, str) and len(key) == 1:
+                chunk.append(key)
+                if len(chunk) == chunk_size:
+                    yield "".join(chunk)
+                    chunk.clear()
+                continue
+
+            if chunk:
+                yield "".join(chunk)
+                chunk.clear()
+            yield key
+
+        if chunk:
+            yield "".join(chunk)
+
+
+@lru_cache(maxsize=128)
+def _validate_exc(cls):
+    """Checks that an expected exception is an exception class. The same few classes are used by most tests so the result is cached.
+    This raises instead of asserting so the check still runs under python -O.
+
+    Args:
+        cls (type): Expected exception
+
+    Returns:
+        type: The same exception class
+    """
+    if not (isinstance(cls, type) and issubclass(cls, BaseException)):
+        raise TypeError(f"Expected exception must be a subclass of BaseException, got {cls}")
+
+    return cls
+
+def _check_nothing(res, expected):
+    return None
+
+def _check_not_raised(res, expected_exception):
+    exc_name = "any exception" if expected_exception == "_" else expected_exception
+    return _FAIL_NOT_RAISED % (exc_name,)
+
+def _check_expect(res, expected_value):
+    if not GenericTesting._compare_results(res, expected_value):
+        return _FAIL_VALUE % (expected_value, res)
+
+def _check_not_expect(res, not_expect):
+    if GenericTesting._compare_results(res, not_expect):
+        return _FAIL_NOT_EXPECT % (res, "any value" if not_expect == "_" else not_expect)
+
+# Checks run on the result of a test that did not raise, indexed by the mode from _get_args_and_exception
+_EXPECTATION_CHECKS = (_check_nothing, _check_not_raised, _check_expect, _check_not_expect)
+
 
 if __name__ == "__main__":
     gt = GenericTesting()
@@ -246,6 +551,19 @@ if __name__ == "__main__":
     
     # test_keypresses()
 
+    def test_keypresses_io_parallel():
+        # Note: The keypresses of the different tests will be interleaved wherever your cursor is.
+
+        tests = [
+            [list("abc"), {"kwargs": True, "delay": 1}],
+            [list("def"), {"kwargs": True, "delay": 1}],
+            [list("ghi"), {"kwargs": True, "delay": 1}],
+        ]
+
+        gt.run_tests(gt._spoof_keypresses, tests, print_args=True, print_res=False, io_parallel=True)
+
+    # test_keypresses_io_parallel()
+
     def test_kwargs():
         def simple_func(a, b, **kwargs):
             return a + b, kwargs
@@ -323,4 +641,48 @@ if __name__ == "__main__":
 
         gt.run_tests(simple_func, tests, print_args=True, print_res=True)
 
-    # test_raise_err()
\ No newline at end of file
+    # test_raise_err()
+
+    def test_cache():
+        calls = []
+        def slow_square(a):
+            calls.append(a)
+            time.sleep(0.5)
+            return a * a
+
+        tests = [
+            [2, { "expect": 4}],
+            [3, { "expect": 9}],
+            [2, { "expect": 4}],
+            [2, { "not_expect": 4}], # This test should fail
+        ]
+
+        gt.run_tests(slow_square, tests, print_args=True, print_res=True, cache=True)
+        gt.run_tests(slow_square, tests, print_args=True, print_res=True, cache=True)
+        print(f"slow_square was called {len(calls)} times for {2 * len(tests)} tests")
+
+    # test_cache()
+
+    def test_generated_cases():
+        def square(a):
+            return a * a
+
+        # The test cases are produced one at a time as the tests run, so this never holds all of them in memory
+        tests = ([i, { "expect": i * i}] for i in range(1000))
+
+        gt.run_tests(square, tests)
+
+    # test_generated_cases()
+
+    def test_parallel():
+        # The function must be picklable to be sent to the worker processes so a builtin is used here instead of a nested function
+        tests = [
+            [2, 3, { "expect": 8}],
+            [2, "a", { "err": TypeError}],
+            [2, -1, { "expect": 0.5}],
+            [3, 3, { "expect": 9}], # This test should fail
+        ]
+
+        gt.run_tests(pow, tests, print_args=True, print_res=True, parallel=True)
+
+    # test_parallel()
@@ -17,25 +17,62 @@ TODO:
 - Enable nested iterables
 """
 
+from collections import namedtuple
+from functools import lru_cache
+from multiprocessing import Pool
 import random
 import numpy as np
 
+from frozen_keys import freeze, thaw
+
+# Sets of types used for membership checks so they are not rebuilt as lists on every call
+_ITER_SET = frozenset((list, tuple, dict, set, np.ndarray))
+_LEN_SET = frozenset((list, tuple, set))
+_CHOICE_SET = frozenset((tuple, list))
+_SIZED_SET = frozenset((list, tuple, set, np.ndarray))
+
+# An argument after it has been merged with the defaults of its type and verified. The generators read its fields as attributes
+# rather than hashing string keys, keys the type does not use are None
+ResolvedArg = namedtuple("ResolvedArg", "type func range size_range characters fill_type keys choices alt_types",
+                         defaults=(None,) * 9)
+
+# dtypes of the fields of the structured array that gen_cases returns for purely numeric arguments
+_STRUCT_DTYPES = {int: np.int64, float: np.float64, bool: np.bool_}
+_INT64 = np.iinfo(np.int64)
+
+# Types allowed in the choices of an argument, keyed by (type, alt_types, fill_type)
+_valid_types_cache = {}
+
+def _identity(x):
+    return x
+
+# Dedicated random number generator for the generators that work one value at a time. Its methods are bound once here
+# so the hot generators do not look them up on the random module for every value
+_R = random.Random()
+_choice = _R.choice
+_choices = _R.choices
+_randint = _R.randint
+_uniform = _R.uniform
+
 class GenTests:
 
-    ITERABLES = [list, tuple, dict, set, np.ndarray]
+    ITERABLES = _ITER_SET
+
+    # Shared numpy random generator so that generating an array does not go through two separate random number generators
+    _RNG = np.random.default_rng()
 
     @staticmethod
     def gen_int(arg):
         """Generates an integer test case
 
         Args:
-            arg (dict): Dictionary of the argument
+            arg (ResolvedArg): The resolved argument
         """
-        if "choices" in arg:
-            return int(random.choice(arg["choices"]))
+        if arg.choices is not None:
+            return int(_choice(arg.choices))
 
-        elif "range" in arg:
-            return random.randint(*arg["range"])
+        elif arg.range is not None:
+            return _randint(*arg.range)
 
         else:
             raise AssertionError("Integers must have a range or a list of choices")
@@ -45,13 +82,13 @@ class GenTests:
         """Generates a float test case
 
         Args:
-            arg (dict): Dictionary of the argument
+            arg (ResolvedArg): The resolved argument
         """
-        if "choices" in arg:
-            return float(random.choice(arg["choices"]))
+        if arg.choices is not None:
+            return float(_choice(arg.choices))
 
-        elif "range" in arg:
-            return random.uniform(*arg["range"])
+        elif arg.range is not None:
+            return _uniform(*arg.range)
 
         else:
             raise AssertionError("Floats must have a range or a list of choices")
@@ -61,78 +98,104 @@ class GenTests:
         """Generates a string test case
 
         Args:
-            arg (dict): Dictionary of the argument
+            arg (ResolvedArg): The resolved argument
         """
-        assert "characters" in arg, "Strings must have a character set"
-        return "".join(random.choices(arg["characters"], k=10))
+        assert arg.characters is not None, "Strings must have a character set"
+        # For a single string random.choices is cheaper than a numpy call, the columns of _gen_column batch through numpy instead
+        return "".join(_choices(arg.characters, k=10))
     
     @staticmethod
     def gen_list(arg):
         """Generates a list test case
 
         Args:
-            arg (dict): Dictionary of the argument
+            arg (ResolvedArg): The resolved argument
         """
-        assert "size_range" in arg, "Lists must have a size range"
-        assert "fill_type" in arg, "Lists must have a fill type"
-        return [arg["fill_type"]["func"](arg["fill_type"]) for _ in range(random.randint(*arg["size_range"]))]
+        assert arg.size_range is not None, "Lists must have a size range"
+        assert arg.fill_type is not None, "Lists must have a fill type"
+        return GenTests._gen_fill(arg, _randint(*arg.size_range))
     
     @staticmethod
     def gen_tuple(arg):
         """Generates a tuple test case
 
         Args:
-            arg (dict): Dictionary of the argument
+            arg (ResolvedArg): The resolved argument
         """
-        assert "size_range" in arg, "Tuples must have a size range"
-        assert "fill_type" in arg, "Tuples must have a fill type"
-        return tuple([arg["fill_type"]["func"](arg["fill_type"]) for _ in range(random.randint(*arg["size_range"]))])
+        assert arg.size_range is not None, "Tuples must have a size range"
+        assert arg.fill_type is not None, "Tuples must have a fill type"
+        return tuple(GenTests._gen_fill(arg, _randint(*arg.size_range)))
     
     @staticmethod
     def gen_dict(arg):
         """Generates a dictionary test case
 
         Args:
-            arg (dict): Dictionary of the argument
+            arg (ResolvedArg): The resolved argument
         """
-        assert "size_range" in arg, "Dictionaries must have a size range"
-        assert "fill_type" in arg, "Dictionaries must have a fill type"
-        assert "keys" in arg, "Dictionaries must have keys"
-        return {key: arg["fill_type"]["func"](arg["fill_type"]) for key in arg["keys"]}
+        assert arg.size_range is not None, "Dictionaries must have a size range"
+        assert arg.fill_type is not None, "Dictionaries must have a fill type"
+        assert arg.keys is not None, "Dictionaries must have keys"
+        return dict(zip(arg.keys, GenTests._gen_fill(arg, len(arg.keys))))
     
     @staticmethod
     def gen_set(arg):
         """Generates a set test case
 
         Args:
-            arg (dict): Dictionary of the argument
+            arg (ResolvedArg): The resolved argument
         """
-        assert "size_range" in arg, "Sets must have a size range"
-        assert "fill_type" in arg, "Sets must have a fill type"
-        return {arg["fill_type"]["func"](arg["fill_type"]) for _ in range(random.randint(*arg["size_range"]))}
+        assert arg.size_range is not None, "Sets must have a size range"
+        assert arg.fill_type is not None, "Sets must have a fill type"
+        return set(GenTests._gen_fill(arg, _randint(*arg.size_range)))
     
+    @staticmethod
+    def _gen_fill(arg, size):
+        """Generates the values that fill an iterable test case. Int and float ranges are generated with a single numpy call
+
+        Args:
+            arg (ResolvedArg): The resolved iterable argument
+            size (int): Number of values to be generated
+
+        Returns:
+            list: The values
+        """
+        # The fill type is given as a type, its generator and range come from the defaults of that type
+        fill = _DEFAULT_ARGS[arg.fill_type]
+        if fill.type is int and fill.range is not None:
+            return GenTests._RNG.integers(*fill.range, size=size, endpoint=True).tolist()
+
+        elif fill.type is float and fill.range is not None:
+            return GenTests._RNG.uniform(*fill.range, size=size).tolist()
+
+        return [fill.func(fill) for _ in range(size)]
+
     @staticmethod
     def gen_bool(arg):
         """Generates a boolean test case
 
         Args:
-            arg (dict): Dictionary of the argument
+            arg (ResolvedArg): The resolved argument
         """
-        assert "choices" in arg, "Booleans must have choices"
-        return random.choice(arg["choices"])
+        assert arg.choices is not None, "Booleans must have choices"
+        return _choice(arg.choices)
     
     @staticmethod
     def gen_np_array(arg):
         """Generates a numpy array test case
 
         Args:
-            arg (dict): Dictionary of the argument
+            arg (ResolvedArg): The resolved argument
         """
-        assert "size_range" in arg, "Numpy arrays must have a size range"
-        assert "fill_type" in arg, "Numpy arrays must have a fill type"
-        assert "range" in arg, "Numpy arrays must have a range"
-        return np.random.randint(*arg["range"], size=random.randint(*arg["size_range"]))
+        assert arg.size_range is not None, "Numpy arrays must have a size range"
+        assert arg.fill_type is not None, "Numpy arrays must have a fill type"
+        assert arg.range is not None, "Numpy arrays must have a range"
+        # A single size is cheaper to draw in python, the shared numpy generator is only used for the values
+        return GenTests._RNG.integers(*arg.range, size=_randint(*arg.size_range), dtype=np.int_)
+
 
+    # Below this many test cases the time to start the worker processes outweighs the time they save
+    PARALLEL_MIN_CASES = 1000
 
     # Dictionary of the argument types and their respective functions
     # Instead of range based value generation a tuple of values to be chosen from under the key "choices" can be passed
@@ -150,7 +213,7 @@ class GenTests:
 
 
     @staticmethod
-    def gen_cases(args, num_cases = 100, kwargs=None):
+    def gen_cases(args, num_cases = 100, kwargs=None, seed=None, workers=None, as_lists=True):
         """Parent class for the generation of the test cases
 
         Args:
@@ -158,25 +221,215 @@ class GenTests:
             for iterables and "characters" for strings 
             num_cases (int, optional): Number of test cases to be generated. Defaults to 100.
             kwargs (list, optional): Under each argument key have a dictionary identical to the args dictionary. Defaults to None.
+            seed (int, optional): Seed for all of the generation, the same seed and arguments always give the same test cases.
+            Defaults to None.
+            workers (int, optional): Number of processes to split the generation across. Batches smaller than PARALLEL_MIN_CASES are always generated
+            in this process. Defaults to None.
+            as_lists (bool, optional): Return every test case as a list. When False and every argument is an int, float or bool the
+            test cases are returned as a structured numpy array with one field per argument named a0, a1, ... Other arguments are
+            still returned as lists. Defaults to True.
         
         Returns:
-            list: List of test cases
+            list | np.ndarray: List of test cases or structured array of test cases
+        """
+        if workers is not None and workers > 1 and num_cases >= GenTests.PARALLEL_MIN_CASES:
+            return GenTests._gen_cases_parallel(args, num_cases, seed, workers, as_lists)
+
+        if seed is None:
+            return GenTests._gen_cases_serial(args, num_cases, GenTests._RNG, as_lists)
+
+        # The generators that work one case at a time read the module level generators, so for the duration of the call those
+        # are replaced with generators spawned from the seed and put back afterwards
+        seq = seed if type(seed) is np.random.SeedSequence else np.random.SeedSequence(seed)
+        py_seed, np_seed, column_seed = seq.spawn(3)
+        py_state, np_rng = _R.getstate(), GenTests._RNG
+        _R.seed(int(py_seed.generate_state(1)[0]))
+        GenTests._RNG = np.random.default_rng(np_seed)
+        try:
+            return GenTests._gen_cases_serial(args, num_cases, np.random.default_rng(column_seed), as_lists)
+        finally:
+            _R.setstate(py_state)
+            GenTests._RNG = np_rng
+
+    @staticmethod
+    def _gen_cases_serial(args, num_cases, rng, as_lists):
+        """Generates the test cases in this process
+
+        Args:
+            args (list): See gen_cases for the format
+            num_cases (int): Number of test cases to be generated
+            rng (np.random.Generator): Random number generator for the columns that are generated up front
+            as_lists (bool): See gen_cases
+
+        Returns:
+            list | np.ndarray: List of test cases or structured array of test cases
         """
         final_args = []
         for arg in args:
-            final_args.append(GenTests._set_args(arg))
+            final_args.append(GenTests._set_args_cached(arg))
 
-        test_cases = []
-        for _ in range(num_cases):
-            test_case = []
-            for arg in final_args:
-                # Call the affiliated function to generate the test case
-                test_case.append(arg["func"](arg))
-                # test_case.append(1)
+        if not as_lists and final_args and all(arg.type in _STRUCT_DTYPES and _fits_int64(arg) for arg in final_args):
+            return GenTests._gen_structured(final_args, num_cases, rng)
 
-            test_cases.append(test_case)
-    
-        return test_cases
+        # Whole columns are generated up front for the types numpy can batch, the rest are generated one case at a time
+        columns = [GenTests._gen_column(arg, num_cases, rng) for arg in final_args]
+
+        # The rows are built by a function compiled for which of the columns were generated up front. Its parameters are the
+        # generated columns and, for the other arguments, the generator and argument that are called once per test case
+        pattern = tuple(column is not None for column in columns)
+        params = []
+        for column, arg in zip(columns, final_args):
+            params.extend((column,) if column is not None else (arg.func, arg))
+
+        return _compile_rows(pattern)(num_cases, *params)
+
+    @staticmethod
+    def _gen_cases_parallel(args, num_cases, seed, workers, as_lists=True):
+        """Splits the test cases into one chunk per worker process and generates the chunks in parallel
+
+        Args:
+            args (list): See gen_cases for the format
+            num_cases (int): Number of test cases to be generated
+            seed (int): Seed that the independent seeds of the workers are spawned from, None for a random seed
+            workers (int): Number of worker processes
+            as_lists (bool, optional): See gen_cases. Defaults to True.
+
+        Returns:
+            list | np.ndarray: List of test cases or structured array of test cases
+        """
+        seeds = np.random.SeedSequence(seed).spawn(workers)
+        sizes = [num_cases // workers + (i < num_cases % workers) for i in range(workers)]
+
+        with Pool(workers) as pool:
+            chunks = pool.map(_gen_cases_worker, [(args, size, worker_seed, as_lists) for size, worker_seed in zip(sizes, seeds)])
+
+        if type(chunks[0]) is np.ndarray:
+            return np.concatenate(chunks)
+
+        return [case for chunk in chunks for case in chunk]
+
+    @staticmethod
+    def _gen_column(arg, num_cases, rng):
+        """Generates the values of one argument for all of the test cases with a single vectorized call
+
+        Args:
+            arg (ResolvedArg): The resolved argument
+            num_cases (int): Number of values to be generated
+            rng (np.random.Generator): Random number generator
+
+        Returns:
+            list: One value for each test case. None if the argument type can only be generated one case at a time
+        """
+        values = GenTests._gen_column_array(arg, num_cases, rng)
+        if values is not None:
+            return values.tolist()
+
+        elif arg.type is str and _char_array(arg.characters) is not None:
+            # Sample the character set as bytes and decode every string at once
+            strings = rng.choice(_char_array(arg.characters), size=(num_cases, 10)).tobytes().decode("ascii")
+            return [strings[i:i+10] for i in range(0, len(strings), 10)]
+
+        elif arg.type in _SIZED_SET:
+            return GenTests._gen_sized_column(arg, num_cases, rng)
+
+        return None
+
+    @staticmethod
+    def _gen_sized_column(arg, num_cases, rng):
+        """Generates a list, tuple, set or numpy array argument for all of the test cases. The sizes of every test case are drawn
+        with one call, then all of their values with another and the values are split into the test cases
+
+        Args:
+            arg (ResolvedArg): The resolved argument
+            num_cases (int): Number of values to be generated
+            rng (np.random.Generator): Random number generator
+
+        Returns:
+            list: One value for each test case. None if the fill type of the argument can only be generated one value at a time
+        """
+        if arg.type is np.ndarray:
+            # Choices replace the range, gen_np_array reports the missing range
+            if arg.range is None:
+                return None
+            fill = None
+        else:
+            fill = _DEFAULT_ARGS[arg.fill_type]
+            if fill.type not in (int, float) or fill.range is None:
+                return None
+
+        if not num_cases:
+            return []
+
+        sizes = rng.integers(*arg.size_range, size=num_cases, endpoint=True)
+        ends = np.cumsum(sizes)
+        total = int(ends[-1])
+
+        # Like gen_np_array the values of an array exclude the top of the range, the fill values of the other iterables do not
+        if fill is None:
+            return np.split(rng.integers(*arg.range, size=total, dtype=np.int_), ends[:-1])
+
+        elif fill.type is int:
+            values = rng.integers(*fill.range, size=total, endpoint=True).tolist()
+
+        else:
+            values = rng.uniform(*fill.range, size=total).tolist()
+
+        pieces = [values[start:end] for start, end in zip((ends - sizes).tolist(), ends.tolist())]
+        if arg.type is tuple:
+            return list(map(tuple, pieces))
+
+        elif arg.type is set:
+            return list(map(set, pieces))
+
+        return pieces
+
+    @staticmethod
+    def _gen_column_array(arg, num_cases, rng):
+        """Generates the values of an int, float or bool argument for all of the test cases as a numpy array
+
+        Args:
+            arg (ResolvedArg): The resolved argument
+            num_cases (int): Number of values to be generated
+            rng (np.random.Generator): Random number generator
+
+        Returns:
+            np.ndarray: One value for each test case. None if the argument is not an int, float or bool with choices or a range,
+            or is an int whose values do not fit in int64
+        """
+        arg_type = arg.type
+        if not _fits_int64(arg):
+            return None
+
+        elif arg_type in (int, float, bool) and arg.choices is not None:
+            return rng.choice(np.asarray(arg.choices, dtype=arg_type), size=num_cases)
+
+        elif arg_type is int and arg.range is not None:
+            return rng.integers(*arg.range, size=num_cases, endpoint=True)
+
+        elif arg_type is float and arg.range is not None:
+            return rng.uniform(*arg.range, size=num_cases)
+
+        return None
+
+    @staticmethod
+    def _gen_structured(final_args, num_cases, rng):
+        """Generates test cases of int, float and bool arguments straight into a structured numpy array
+
+        Args:
+            final_args (list): Arguments as returned by _set_args, all of type int, float or bool
+            num_cases (int): Number of test cases to be generated
+            rng (np.random.Generator): Random number generator
+
+        Returns:
+            np.ndarray: One record for each test case with the field a{i} holding argument i
+        """
+        out = np.empty(num_cases, dtype=[(f"a{i}", _STRUCT_DTYPES[arg.type]) for i, arg in enumerate(final_args)])
+        for i, arg in enumerate(final_args):
+            values = GenTests._gen_column_array(arg, num_cases, rng)
+            assert values is not None, f"Argument {i} of type {arg.type} must have a range or a list of choices"
+            out[f"a{i}"] = values
+
+        return out
 
     @staticmethod
     def _gen_case(arg_dict):
@@ -192,19 +445,47 @@ class GenTests:
 
         Args:
             arg_dict (dict): Dictionary of the argument
+
+        Returns:
+            ResolvedArg: The argument merged with the defaults of its type
         """
-        GenTests._verify_arg(arg_dict, verify_kwargs = False)
+        # The type is only checked once here, the merged argument then only needs its keys verified
+        assert type(arg_dict) == dict, "Argument must be a dictionary"
+        assert "type" in arg_dict, "Argument must have a type key"
         arg_type = arg_dict.get("type")
-        arg = GenTests.ARG_TYPES[arg_type].copy()
-        arg.update(arg_dict)
+        assert arg_type in GenTests.ARG_TYPES, f"Argument type {arg_type} is not supported"
 
+        arg = {**GenTests.ARG_TYPES[arg_type], **arg_dict}
 
-        if "choices" in arg and "range" in arg:
-            del arg["range"]
+        # Choices replace the range
+        if "choices" in arg:
+            arg.pop("range", None)
 
-        GenTests._verify_arg(arg, verify_kwargs = True)
-        
-        return arg
+        GenTests._verify_arg_post(arg)
+
+        # Keys that are not fields of ResolvedArg are not used by any generator
+        return ResolvedArg(**{key: arg[key] for key in ResolvedArg._fields if key in arg})
+
+    @staticmethod
+    def _set_args_cached(arg_dict):
+        """Same as _set_args, but an argument spec that has been seen before is not merged and verified again.
+        The returned ResolvedArg is shared between calls
+
+        Args:
+            arg_dict (dict): Dictionary of the argument
+        """
+        try:
+            # A spec with nothing but the type is the most common case and is just the defaults of the type
+            if type(arg_dict) is dict and len(arg_dict) == 1 and arg_dict.get("type") in _DEFAULT_ARGS:
+                return _DEFAULT_ARGS[arg_dict["type"]]
+
+            key = freeze(arg_dict)
+            hash(key)
+        except TypeError:
+            # Specs holding unhashable values such as numpy arrays are not cached
+            return GenTests._set_args(arg_dict)
+
+        return _set_args_frozen(key)
 
     @staticmethod
     def _verify_arg(arg, verify_kwargs = True):
@@ -219,25 +500,42 @@ class GenTests:
         assert arg_type in GenTests.ARG_TYPES, f"Argument type {arg_type} is not supported"
 
         if verify_kwargs:
-            for key in arg.keys():
-                if key == "choices":
-                    assert type(arg[key]) in [tuple, list], "Choices must be a list or tuple"
-                    ft = arg.get("fill_type")
-                    valid_types = [arg_type]
-                    valid_types += arg.get("alt_types") or []
-                    if ft is not None:
-                        valid_types.append(ft)
-                        valid_types += GenTests.ARG_TYPES[ft].get("alt_types") or []
+            GenTests._verify_arg_post(arg)
 
-                    # Note: This may need to be changed for nested iterables to work. At the moment it only works for single level iterables
-                    assert all(type(v) in valid_types for v in arg[key]), "Choices must either match the argument type or the fill type"
-                
-                elif key == "fill_type":
-                    assert arg[key] in GenTests.ARG_TYPES, f"{arg[key]} not in the argument types"
+        return True
+
+    @staticmethod
+    def _verify_arg_post(arg):
+        """Verifies the keys of an argument whose type has already been verified
+
+        Args:
+            arg (dict): Dictionary of the argument
+        """
+        arg_type = arg.get("type")
+        defaults = GenTests.ARG_TYPES[arg_type]
+        for key in arg.keys():
+            if key == "choices":
+                assert type(arg[key]) in _CHOICE_SET, "Choices must be a list or tuple"
+                ft = arg.get("fill_type")
+                alt_types = tuple(arg.get("alt_types") or ())
+                valid_types = _valid_types_cache.get((arg_type, alt_types, ft))
+                if valid_types is None:
+                    valid_types = {arg_type, *alt_types}
+                    if ft is not None:
+                        valid_types.add(ft)
+                        valid_types.update(GenTests.ARG_TYPES[ft].get("alt_types") or [])
+                    valid_types = _valid_types_cache[(arg_type, alt_types, ft)] = frozenset(valid_types)
 
-                elif key in GenTests.ARG_TYPES[arg_type]:
-                    assert GenTests._compare_type(arg[key], GenTests.ARG_TYPES[arg_type][key], soft_compare = True), f"Argument key {key} is not of same type as {GenTests.ARG_TYPES[arg_type][key]}"
+                # Note: This may need to be changed for nested iterables to work. At the moment it only works for single level iterables
+                if not all(type(v) in valid_types for v in arg[key]):
+                    raise AssertionError("Choices must either match the argument type or the fill type")
             
+            elif key == "fill_type":
+                assert arg[key] in GenTests.ARG_TYPES, f"{arg[key]} not in the argument types"
+
+            elif key in defaults:
+                assert GenTests._compare_type(arg[key], defaults[key], soft_compare = True), f"Argument key {key} is not of same type as {defaults[key]}"
+
 
         return True
 
@@ -280,7 +578,7 @@ class iterable_handler:
     A singular class to handle all types of iterables and make operations with them simpler
     """
 
-    ITERABLES = [list, tuple, dict, set, np.ndarray]
+    ITERABLES = _ITER_SET
 
     ITER_CONVERSIONS = {
         list: {
@@ -323,49 +621,28 @@ class iterable_handler:
         },
     }
 
+    # Both conversion tables flattened and keyed by (from type, to type) so that finding a conversion is a single lookup
+    _CONV = {}
+    for _from, _convs in (*ITER_CONVERSIONS.items(), *SINGLE_CONVERSIONS.items()):
+        for _to, _conv in _convs.items():
+            _CONV[(_from, _to)] = _conv
+    del _from, _convs, _to, _conv
+
     @staticmethod
     def length(iterable):
-        if type(iterable) in [list, tuple, set]:
+        t = type(iterable)
+        if t in _LEN_SET:
             return len(iterable)
         
-        elif type(iterable) == dict:
+        elif t is dict:
             return len(iterable.keys())
         
-        elif type(iterable) in [np.ndarray]:
+        elif t is np.ndarray:
             return iterable.shape[0]
 
         else:
             return 1
 
-    @staticmethod
-    def _find_conversion_iterable(iter1, iter2):
-        """Between 2 variables it determines if there is a suitable conversion between them. The conversion function is returned if it exists
-
-        Args:
-            iter1 (any): variable 1
-            iter2 (any): variable 2
-
-        Returns:
-            function: The conversion function. None if it does not exist
-        """
-        if type(iter1) == type(iter2):
-            return lambda x: x
-
-        if type(iter1) in iterable_handler.ITERABLES and type(iter2) in iterable_handler.ITERABLES:
-            return iterable_handler.ITER_CONVERSIONS[type(iter1)].get(type(iter2))
-
-        return None
-
-    @staticmethod
-    def _find_singleton_conv(v1, v2):
-        if type(v1) == type(v2):
-            return lambda x: x
-
-        if type(v1) in iterable_handler.SINGLE_CONVERSIONS:
-            return iterable_handler.SINGLE_CONVERSIONS[type(v1)].get(type(v2))
-
-        return None
-
     @staticmethod
     def find_conversion(v1, v2):
         """Finds the conversion function between two variables
@@ -377,40 +654,157 @@ class iterable_handler:
         Returns:
             function: The conversion function. None if it does not exist
         """
-        conv = iterable_handler._find_conversion_iterable(v1, v2)
-
-        if conv is None:
-            conv = iterable_handler._find_singleton_conv(v1, v2)
+        t1, t2 = type(v1), type(v2)
+        if t1 is t2:
+            return _identity
 
-        return conv
+        return iterable_handler._CONV.get((t1, t2))
 
     @staticmethod
     def compare(iterable1, iterable2, compare_type = True, compare_size = True, soft_compare = False):
-        eq = True
-        if compare_size:
-            eq = iterable_handler.length(iterable1) == iterable_handler.length(iterable2)
-        if compare_type:
-            if not soft_compare:
-                eq = eq and type(iterable1) == type(iterable2)
-            else:
-                eq = eq and (iterable_handler.find_conversion(iterable1, iterable2) is not None)
+        """Compares two variables and all of the values nested inside of them. The structure is walked with an explicit stack and the walk stops at the first mismatch
 
+        Args:
+            iterable1 (any): First variable
+            iterable2 (any): Second variable
+            compare_type (bool, optional): Compare the types of the variables. Defaults to True.
+            compare_size (bool, optional): Compare the lengths of the variables. Defaults to True.
+            soft_compare (bool, optional): Types only need a conversion between them to be considered the same. Defaults to False.
 
-        if iterable_handler._is_iterable(iterable1) and iterable_handler._is_iterable(iterable2):
-            for v1, v2 in zip(iterable1, iterable2):
-                eq = eq and iterable_handler.compare(v1, v2, compare_type, compare_size, soft_compare=soft_compare)
+        Returns:
+            bool: True if the variables match
+        """
+        length = iterable_handler.length
+        iterables = iterable_handler.ITERABLES
+
+        stack = [(iterable1, iterable2)]
+        while stack:
+            v1, v2 = stack.pop()
+            t1, t2 = type(v1), type(v2)
+            both_arrays = t1 is np.ndarray and t2 is np.ndarray
+
+            # Cheapest checks first: the strict type check is an identity test, the size may need a len call and the soft
+            # type check a conversion lookup
+            if compare_type and not soft_compare and t1 != t2:
+                return False
+
+            if compare_size:
+                if both_arrays:
+                    if v1.shape != v2.shape:
+                        return False
+                elif length(v1) != length(v2):
+                    return False
+
+            if compare_type and soft_compare and iterable_handler.find_conversion(v1, v2) is None:
+                return False
+
+            # The elements of two arrays with the same number of dimensions all have the scalar type of their dtype, so they do not need to be
+            # visited. The scalar types are compared rather than the dtypes, which also differ in string length, byte order and datetime unit
+            if both_arrays and compare_type and not compare_size and not soft_compare and v1.ndim == v2.ndim and v1.dtype != object:
+                if v1.size and v2.size and v1.dtype.type is not v2.dtype.type:
+                    return False
+                continue
+
+            if t1 in iterables and t2 in iterables:
+                stack.extend(zip(v1, v2))
 
-        return eq    
+        return True
 
     @staticmethod
     def _is_iterable(var):
-        return type(var) in iterable_handler.ITERABLES
+        return type(var) in _ITER_SET
 
     @staticmethod
     def compare_size_type(var1, var2):
         return iterable_handler.compare(var1, var2, True, True)
 
 
+def _gen_cases_worker(job):
+    """Generates one chunk of test cases in a worker process for GenTests._gen_cases_parallel
+
+    Args:
+        job (tuple): The argument specs, the number of test cases, the SeedSequence of the worker and as_lists
+    """
+    args, num_cases, seed, as_lists = job
+    # Every worker starts with a copy of the module level generators, a seeded call replaces them to keep the chunks independent
+    return GenTests.gen_cases(args, num_cases, seed=seed, as_lists=as_lists)
+
+@lru_cache(maxsize=256)
+def _compile_rows(pattern):
+    """Compiles the function that assembles the test cases of gen_cases. For the pattern (True, False) it is
+    def _rows(n, c0, f1, a1): return [[v0, f1(a1)] for v0 in c0]
+    so building a row does not branch on or unpack anything for each argument
+
+    Args:
+        pattern (tuple): One bool per argument, True if its values were generated as a column
+
+    Returns:
+        function: Takes the number of test cases followed by the column, or the generator and the argument, of every argument
+    """
+    params, items, targets, columns = ["n"], [], [], []
+    for i, batched in enumerate(pattern):
+        if batched:
+            params.append(f"c{i}")
+            items.append(f"v{i}")
+            targets.append(f"v{i}")
+            columns.append(f"c{i}")
+        else:
+            params.extend((f"f{i}", f"a{i}"))
+            items.append(f"f{i}(a{i})")
+
+    if not columns:
+        loop = "for _ in range(n)"
+    elif len(columns) == 1:
+        loop = f"for {targets[0]} in {columns[0]}"
+    else:
+        loop = f"for {', '.join(targets)} in zip({', '.join(columns)})"
+
+    source = f"def _rows({', '.join(params)}):\n    return [[{', '.join(items)}] {loop}]\n"
+    namespace = {}
+    exec(compile(source, "<gen_cases rows>", "exec"), namespace)
+    return namespace["_rows"]
+
+@lru_cache(maxsize=64)
+def _char_array(characters):
+    """Converts a character set into an array of bytes that numpy can sample from. The same few character sets are used
+    over and over so the conversion is cached
+
+    Args:
+        characters (str): Character set of a string argument
+
+    Returns:
+        np.ndarray: The characters as uint8, None if the set is empty or not ascii and has to be sampled in python
+    """
+    if not characters or not characters.isascii():
+        return None
+
+    return np.frombuffer(characters.encode("ascii"), dtype=np.uint8)
+
+def _fits_int64(arg):
+    """Checks that the choices or the range of an int argument fit in int64 so that numpy can generate them. Python ints
+    outside of int64 are generated one value at a time. Arguments of other types always fit
+
+    Args:
+        arg (ResolvedArg): The resolved argument
+
+    Returns:
+        bool: False if the int argument has a value outside of int64
+    """
+    if arg.type is not int:
+        return True
+
+    values = arg.choices if arg.choices is not None else arg.range
+    return values is None or all(_INT64.min <= v <= _INT64.max for v in values)
+
+@lru_cache(maxsize=1024)
+def _set_args_frozen(key):
+    # ARG_TYPES never changes so the merged arguments never need to be invalidated
+    return GenTests._set_args(thaw(key))
+
+# Merged and verified arguments for specs that only give the type. Like the cached specs these are shared and must not be modified
+_DEFAULT_ARGS = {arg_type: GenTests._set_args({"type": arg_type}) for arg_type in GenTests.ARG_TYPES}
+
+
 if __name__ == "__main__":
     from generic_testing import GenericTesting
     gt = GenericTesting()
@@ -526,6 +920,82 @@ if __name__ == "__main__":
 
         gt.run_tests(GenTests.gen_cases, float_tests, print_args=True, print_res=True)
 
+    def test_seeded_cases():
+        def same_cases(args, num_cases, seed, workers=None):
+            # repr is compared since the cases can hold numpy arrays
+            first = GenTests.gen_cases(args, num_cases, seed=seed, workers=workers)
+            return repr(first) == repr(GenTests.gen_cases(args, num_cases, seed=seed, workers=workers))
+
+        tests = [
+            [[{"type": int}, {"type": float}, {"type": str}, {"type": bool}], 10, 7, {"expect":True}],
+            [[{"type": dict}], 10, 7, {"expect":True}],
+            [[{"type": list, "fill_type": str}, {"type": list, "fill_type": list}], 10, 7, {"expect":True}],
+            [[{"type": tuple}, {"type": set}, {"type": np.ndarray}], 10, 7, {"expect":True}],
+            [[{"type": int}, {"type": dict}], 2000, 7, {"kwargs":True, "workers": 2}, {"expect":True}],
+            [[{"type": int}, {"type": dict}], 10, None, {"expect":False}],
+        ]
+
+        gt.run_tests(same_cases, tests, print_args=True, print_res=True)
+
+    # test_seeded_cases()
+
+    def test_structured_cases():
+        def fields(args, num_cases):
+            cases = GenTests.gen_cases(args, num_cases, as_lists=False)
+            if type(cases) is not np.ndarray:
+                return type(cases)
+
+            return len(cases), [(name, cases.dtype[name].name) for name in cases.dtype.names]
+
+        tests = [
+            [[{"type": int}, {"type": float}, {"type": bool}], 5, {"expect":(5, [("a0", "int64"), ("a1", "float64"), ("a2", "bool")])}],
+            [[{"type": int, "choices": [1, 2]}, {"type": float, "range": (0, 1)}], 3, {"expect":(3, [("a0", "int64"), ("a1", "float64")])}],
+            [[{"type": int}, {"type": str}], 5, {"expect":list}],
+            [[{"type": int, "range": (0, 2**70)}], 5, {"expect":list}],
+        ]
+
+        gt.run_tests(fields, tests, print_args=True, print_res=True)
+
+    # test_structured_cases()
+
+    def test_batched_cases():
+        def in_ranges(arg, num_cases):
+            resolved = GenTests._set_args(arg)
+            if resolved.type is int:
+                lo, hi = resolved.range
+                return all(type(v) is int and lo <= v <= hi for (v,) in GenTests.gen_cases([arg], num_cases))
+
+            low_size, high_size = resolved.size_range
+            # Arrays exclude the top of their range, the int fills of the other iterables do not
+            if resolved.type is np.ndarray:
+                lo, hi = resolved.range
+                hi -= 1
+            else:
+                lo, hi = _DEFAULT_ARGS[resolved.fill_type].range
+
+            for (case,) in GenTests.gen_cases([arg], num_cases):
+                # Sets can be smaller than the drawn size since repeated values collapse
+                if type(case) is not resolved.type or len(case) > high_size or (resolved.type is not set and len(case) < low_size):
+                    return False
+                if not all(lo <= v <= hi for v in case):
+                    return False
+
+            return True
+
+        tests = [
+            [{"type": list, "size_range": (2, 5)}, 200, {"expect":True}],
+            [{"type": tuple, "size_range": (0, 3)}, 200, {"expect":True}],
+            [{"type": set, "size_range": (1, 4)}, 200, {"expect":True}],
+            [{"type": np.ndarray, "size_range": (0, 4), "range": (-5, 5)}, 200, {"expect":True}],
+            [{"type": list, "size_range": (0, 0)}, 10, {"expect":True}],
+            [{"type": int, "range": (2**70, 2**70 + 10)}, 200, {"expect":True}],
+            [{"type": int, "range": (-2**64, 0)}, 200, {"expect":True}],
+        ]
+
+        gt.run_tests(in_ranges, tests, print_args=True, print_res=True)
+
+    # test_batched_cases()
+
 
     test_gen_cases()
 